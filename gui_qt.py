@@ -6,17 +6,20 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import time # Kalibrasyon için time modülünü içe aktar
+import numpy as np
 
 # Bu modüllerin ortamınızda mevcut olduğu varsayılıyor
 # Eğer bu modüller aynı dizinde değilse, PYTHONPATH'inizi ayarlamanız
 # veya onları uygun yere yerleştirmeniz gerekecektir.
 try:
-    from posturedetector import PoseDetector
+    from posturedetector import PoseDetector, N_LANDMARKS, METRIC_NAMES, STATUS_TABLE
     from notifier import send_notification
     from logger import set_user, log_posture
+    from livebuffer import RingBuffer
+    from posturefilter import OneEuroFilter, PostureDebouncer, LandmarkRecorder, load_config, save_config
 except ImportError as e:
     print(f"Özel modüller içe aktarılırken hata oluştu: {e}")
-    print("'posturedetector.py', 'notifier.py' ve 'logger.py' dosyalarının aynı dizinde olduğundan emin olun.")
+    print("'posturedetector.py', 'posturefilter.py', 'livebuffer.py', 'notifier.py' ve 'logger.py' dosyalarının aynı dizinde olduğundan emin olun.")
     sys.exit(1)
 
 
@@ -45,12 +48,31 @@ class MainWindow(QtWidgets.QMainWindow):
         # Düşük ışık için CLAHE (Kontrast Sınırlı Adaptif Histogram Eşitleme)
         self.clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
 
+        # Zamansal katman: landmark yumuşatma ve debounce edilmiş duruş durumları
+        self.filter_config = load_config(username)
+        self.smoother = OneEuroFilter(
+            (1, N_LANDMARKS, 2), self.filter_config["min_cutoff"],
+            self.filter_config["beta"], self.filter_config["d_cutoff"])
+        self.debouncer = PostureDebouncer(n_streams=1)
+        self.recorder = None # Landmark kaydı açıkken parça parça diske yazan kaydedici
+
+        # Canlı grafik için bellek içi halka buffer. Kapasite, kare döngüsü beklenenden
+        # hızlı çalışsa bile pencerenin tamamını tutacak şekilde en yüksek FPS'e göre ayrılır.
+        self.live_window = 60 # Canlı grafikte gösterilen süre (saniye)
+        self.live_max_fps = 60 # Desteklenen en yüksek kare hızı (30 ms zamanlayıcı ~33 FPS)
+        self.live_buffer = RingBuffer(
+            capacity=self.live_window * self.live_max_fps, n_metrics=len(METRIC_NAMES))
+
         self.init_ui() # Kullanıcı arayüzünü başlat
         self.apply_stylesheet() # Özel stil uygulamasını çağır
         
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.update_frame) # Zamanlayıcıyı kare güncellemeye bağla
 
+        # Canlı grafik kare döngüsünden bağımsız, sabit ~4 Hz hızında yenilenir
+        self.live_timer = QtCore.QTimer()
+        self.live_timer.timeout.connect(self.update_live_plot)
+
     def apply_stylesheet(self):
         """Uygulamaya modern ve temiz bir QSS stil sayfası uygular."""
         self.setStyleSheet("""
@@ -203,6 +225,31 @@ class MainWindow(QtWidgets.QMainWindow):
         self.chk_ll = QtWidgets.QCheckBox("Düşük Işık Modu")
         settings_layout.addRow(self.chk_ll)
 
+        # Debounce ayarları (kullanıcıya özel olarak kaydedilir)
+        self.sb_dwell = QtWidgets.QSpinBox()
+        self.sb_dwell.setRange(0, 10000)
+        self.sb_dwell.setSingleStep(100)
+        self.sb_dwell.setValue(int(self.filter_config["min_dwell"] * 1000))
+        self.sb_dwell.setSuffix(" ms")
+        settings_layout.addRow("Durum Değişim Süresi:", self.sb_dwell)
+
+        self.sb_hys_sh = QtWidgets.QSpinBox()
+        self.sb_hys_sh.setRange(0, 100)
+        self.sb_hys_sh.setValue(int(self.filter_config["shoulder_hysteresis"]))
+        self.sb_hys_sh.setSuffix(" px")
+        settings_layout.addRow("Omuz Histerezisi:", self.sb_hys_sh)
+
+        self.sb_hys_ang = QtWidgets.QSpinBox()
+        self.sb_hys_ang.setRange(0, 45)
+        self.sb_hys_ang.setValue(int(self.filter_config["angle_hysteresis"]))
+        self.sb_hys_ang.setSuffix(" °")
+        settings_layout.addRow("Açı Histerezisi:", self.sb_hys_ang)
+
+        # Tekrar oynatma (posturefilter.py) için landmark kaydı
+        self.chk_rec = QtWidgets.QCheckBox("Landmark Kaydı")
+        self.chk_rec.toggled.connect(self.toggle_recording)
+        settings_layout.addRow(self.chk_rec)
+
         # Kalibre Et Butonu
         btn_cal = QtWidgets.QPushButton("Kalibre Et (5s)")
         btn_cal.clicked.connect(self.calibrate)
@@ -215,6 +262,35 @@ class MainWindow(QtWidgets.QMainWindow):
         report_layout = QtWidgets.QVBoxLayout(report_tab)
         report_layout.setContentsMargins(20, 20, 20, 20) # Rapor sekmesi için dolgu
 
+        # Canlı grafik: eksenler bir kez kurulur, sonra sadece çizgi verisi güncellenir.
+        # Açılar (°) ve omuz farkı (px) farklı ölçekte olduğundan ayrı eksenlerde çizilir.
+        self.live_canvas = FigureCanvas(Figure(figsize=(8, 3.5)))
+        self.live_canvas.figure.patch.set_facecolor('#f0f2f5')
+        ax_angle = self.live_canvas.figure.add_subplot(211)
+        ax_shoulder = self.live_canvas.figure.add_subplot(212, sharex=ax_angle)
+        ax_angle.set_title(f"Canlı Ölçüm (Son {self.live_window} sn)", fontsize=12, color='#2c3e50')
+        ax_angle.set_xlim(-self.live_window, 0) # x ekseni: şimdiye göre saniye
+        ax_angle.set_ylim(0, 180)
+        ax_angle.set_ylabel("Açı (°)", fontsize=10, color='#333333')
+        ax_shoulder.set_ylim(0, 100)
+        ax_shoulder.set_ylabel("Omuz (px)", fontsize=10, color='#333333')
+        ax_shoulder.set_xlabel("Saniye", fontsize=10, color='#333333')
+        for ax in (ax_angle, ax_shoulder):
+            ax.grid(True, linestyle='--', alpha=0.7)
+        # METRIC_NAMES sırasıyla bir çizgi: omuz farkı, boyun açısı, sırt açısı
+        self.live_lines = [
+            ax_shoulder.plot([], [], color='#dc3545', linewidth=1.5, animated=True, label='Omuz Farkı')[0],
+            ax_angle.plot([], [], color='#8e44ad', linewidth=1.5, animated=True, label='Boyun Açısı')[0],
+            ax_angle.plot([], [], color='#3498db', linewidth=1.5, animated=True, label='Sırt Açısı')[0],
+        ]
+        ax_angle.legend(loc='lower left', fontsize=8)
+        ax_shoulder.legend(loc='upper left', fontsize=8)
+        self.live_canvas.figure.tight_layout()
+        self.live_background = None
+        # Tuval her tam çizildiğinde (ilk gösterim, yeniden boyutlandırma) arka planı yakala
+        self.live_canvas.mpl_connect('draw_event', self.on_live_draw)
+        report_layout.addWidget(self.live_canvas)
+
         self.canvas = FigureCanvas(Figure(figsize=(8, 6))) # Daha iyi detay için daha büyük şekil
         self.canvas.figure.patch.set_facecolor('#f0f2f5') # Arka planla uyum için arka plan rengini eşleştir
         report_layout.addWidget(self.canvas)
@@ -239,6 +315,15 @@ class MainWindow(QtWidgets.QMainWindow):
             # Duraklatma bitince, status_label'ın stilini update_frame'in ayarlamasına bırak
             # İlk karede doğru stil tekrar uygulanacaktır.
 
+    def toggle_recording(self, checked):
+        """Landmark kaydını başlatır veya bekleyen kareleri yazıp kaydı bitirir."""
+        if checked:
+            base_path = os.path.join("logs", f"landmarks_{self.username}_{time.strftime('%Y%m%d_%H%M%S')}")
+            self.recorder = LandmarkRecorder(base_path)
+        elif self.recorder:
+            self.recorder.flush()
+            self.recorder = None
+
     def start(self):
         """Video yakalamayı ve güncelleme zamanlayıcısını başlatır."""
         self.cap = cv2.VideoCapture(0) # Varsayılan kamerayı aç
@@ -246,6 +331,7 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.critical(self, "Kamera Hatası", "Kamera açılamadı. Lütfen kameranın bağlı ve başka bir uygulama tarafından kullanılmadığından emin olun.")
             sys.exit(1) # Kamera açılamazsa çık
         self.timer.start(30) # Her 30 milisaniyede bir güncelle (~33 FPS)
+        self.live_timer.start(250) # Canlı grafiği saniyede 4 kez yenile
         self.show() # Ana pencereyi göster
 
     def update_frame(self):
@@ -276,10 +362,30 @@ class MainWindow(QtWidgets.QMainWindow):
             frame = cv2.cvtColor(cv2.merge((cl, a, b)), cv2.COLOR_LAB2BGR)
 
         # PoseDetector ile kareyi işle
-        # Yeni: Boyun eşiklerini de process metoduna gönder
-        status, needs_correction, color_hex, val, landmarks = self.detector.process(
-            frame, self.shoulder_thresh, self.angle_lower, self.angle_upper,
-            self.neck_angle_lower, self.neck_angle_upper)
+        # Sınıflandırma aşağıdaki zamansal katmanda yapılır; burada sadece landmarklar alınır
+        landmarks = self.detector.detect(frame)
+
+        # Zamansal katman: landmarkları yumuşat, metrikleri histerezis ve bekleme süresiyle debounce et
+        now = time.monotonic()
+        if landmarks:
+            frame_h, frame_w = frame.shape[:2]
+            points = self.detector.landmarks_to_array(landmarks, frame_w, frame_h)
+        else:
+            points = np.full((N_LANDMARKS, 2), np.nan) # Kişi yok: filtre sıfırlanır
+        lower = (-np.inf, self.neck_angle_lower, self.angle_lower)
+        upper = (self.shoulder_thresh, self.neck_angle_upper, self.angle_upper)
+        if self.recorder:
+            self.recorder.append(now, points, lower, upper) # Tekrar oynatma için eşikler de saklanır
+
+        metrics = self.detector.compute_metrics(self.smoother(points[None], now))
+        self.debouncer.set_thresholds(lower, upper)
+        self.debouncer.hysteresis[:] = (self.sb_hys_sh.value(), self.sb_hys_ang.value(), self.sb_hys_ang.value())
+        self.debouncer.min_dwell = self.sb_dwell.value() / 1000.0
+        codes, values, changed = self.debouncer.update(metrics, now)
+
+        # Ekranda, bildirimde ve logda ham sonuç yerine debounce edilmiş durum kullanılır
+        status, color_hex, needs_correction = STATUS_TABLE[codes[0]]
+        val, status_changed = float(values[0]), bool(changed[0])
 
         # Durum arka plan renklerini tanımla
         status_bg_color_map = {
@@ -320,12 +426,33 @@ class MainWindow(QtWidgets.QMainWindow):
         self.status_label.setText(f"{status}: {val:.1f} {unit}")
         self.status_label.setStyleSheet(f"font-size:24px; font-weight:bold; padding:10px; border-radius:8px; margin-top:15px; color:white; {status_bg_style}")
 
-        # Düzeltme gerekiyorsa bildirim gönder
-        if needs_correction:
-            send_notification("Duruş Uyarısı", status)
-
-        # Duruş verilerini logla
-        log_posture(status, val)
+        # Bildirim ve log sadece durum değiştiğinde; canlı grafik her karede güncellenir
+        if status_changed:
+            if needs_correction:
+                send_notification("Duruş Uyarısı", status)
+            log_posture(status, val)
+        self.live_buffer.append(codes[0], metrics[0]) # Kişi yoksa NaN: grafikte boşluk olarak görünür
+
+    def on_live_draw(self, event):
+        """Canlı grafiğin tam çiziminden sonra blit için eksen arka planını saklar."""
+        figure = self.live_canvas.figure
+        self.live_background = self.live_canvas.copy_from_bbox(figure.bbox)
+        for line in self.live_lines:
+            figure.draw_artist(line)
+
+    def update_live_plot(self):
+        """Canlı grafiği halka buffer'dan okur ve sadece çizgiyi blit ile yeniden çizer."""
+        if self.live_background is None or not self.live_canvas.isVisible():
+            return # Sekme görünmüyorsa çizim yapma
+
+        now = time.monotonic()
+        ts, _, vals = self.live_buffer.latest(self.live_window, now)
+        figure = self.live_canvas.figure
+        self.live_canvas.restore_region(self.live_background)
+        for i, line in enumerate(self.live_lines):
+            line.set_data(ts - now, vals[:, i])
+            figure.draw_artist(line)
+        self.live_canvas.blit(figure.bbox)
 
     def calibrate(self):
         """
@@ -443,8 +570,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.canvas.figure.clear() # Veri geçerliyse tekrar temizlemek için temizle
         ax = self.canvas.figure.add_subplot(111) # Alt çizimi ekle
         
-        # 'value' değerini zamanla birlikte çizme
-        ax.plot(df_today['timestamp'], df_today['value'], color='#3498db', linewidth=1.5)
+        # Log her durum değişiminde bir satır içerir; değer bir sonraki olaya kadar geçerli
+        # olduğundan noktalar arası eğim çizilmez, basamak olarak gösterilir.
+        # Değeri olmayan durumlar (kişi yok / bekleniyor) grafikte boşluk olarak kalır.
+        if 'status' in df_today.columns:
+            no_value = df_today['status'].isin(["Kişi Algılanamadı", "Bekleniyor"])
+        else:
+            no_value = pd.Series(False, index=df_today.index)
+        values = df_today['value'].mask(no_value)
+        ax.plot(df_today['timestamp'], values, color='#3498db', linewidth=1.5,
+                drawstyle='steps-post', marker='o', markersize=3)
 
         # Eşik çizgilerini duruma göre ekle
         if 'status' in df_today.columns:
@@ -481,6 +616,18 @@ class MainWindow(QtWidgets.QMainWindow):
     def closeEvent(self, event):
         """Pencere kapanış olayını ele alır, zamanlayıcıyı durdurur ve kamerayı serbest bırakır."""
         self.timer.stop() # Güncelleme zamanlayıcısını durdur
+        self.live_timer.stop() # Canlı grafik zamanlayıcısını durdur
+
+        # Kullanıcının debounce ayarlarını sakla
+        self.filter_config["min_dwell"] = self.sb_dwell.value() / 1000.0
+        self.filter_config["shoulder_hysteresis"] = float(self.sb_hys_sh.value())
+        self.filter_config["angle_hysteresis"] = float(self.sb_hys_ang.value())
+        save_config(self.username, self.filter_config)
+
+        # Landmark kaydında bekleyen son parçayı diske yaz
+        if self.recorder:
+            self.recorder.flush()
+
         if self.cap:
             self.cap.release() # Kamerayı serbest bırak
         cv2.destroyAllWindows() # Herhangi bir OpenCV penceresini kapat (varsa)
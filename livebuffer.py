@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Son ölçümleri diske dokunmadan bellekte tutan sabit kapasiteli halka buffer.
+
+    Tüm diziler başlangıçta bir kez ayrılır; kapasite dolunca en eski kayıtların
+    üzerine yazılır. Böylece saatlerce süren oturumlarda bellek kullanımı sabit kalır.
+    Zaman damgaları time.monotonic() ile alınır; sistem saati değişse de sıralı kalır.
+    Durumlar, çağıran tarafın verdiği küçük tamsayı kodlarıyla saklanır.
+    """
+
+    def __init__(self, capacity: int = 2048, n_metrics: int = 1):
+        if capacity <= 0:
+            raise ValueError("capacity pozitif olmalıdır")
+        self.capacity = capacity
+        self.n_metrics = n_metrics
+        self._timestamps = np.zeros(capacity, dtype=np.float64) # time.monotonic() saniyesi
+        self._codes = np.full(capacity, -1, dtype=np.int8)
+        self._values = np.zeros((capacity, n_metrics), dtype=np.float32)
+        self._head = 0 # Bir sonraki yazılacak indeks
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, code: int, values, timestamp: float = None):
+        """Bir ölçümü (durum kodu ve metrik değerleri) buffer'a ekler; buffer doluysa en eski kaydın üzerine yazar."""
+        i = self._head
+        self._timestamps[i] = time.monotonic() if timestamp is None else timestamp
+        self._codes[i] = code
+        self._values[i] = values
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def clear(self):
+        """Buffer'ı boşaltır (diziler yeniden ayrılmaz)."""
+        self._head = 0
+        self._count = 0
+
+    def latest(self, seconds: float = None, now: float = None):
+        """
+        Kayıtları eskiden yeniye sıralı olarak döndürür.
+
+        Args:
+            seconds (float): Verilirse sadece son `seconds` saniyedeki kayıtlar döner.
+            now (float): Pencerenin bitiş zamanı (varsayılan: time.monotonic()).
+
+        Returns:
+            tuple: (zaman damgaları, durum kodları, değerler) numpy dizileri
+        """
+        start = self._head - self._count
+        if start >= 0:
+            sl = slice(start, self._head)
+            ts, codes, vals = self._timestamps[sl], self._codes[sl], self._values[sl]
+        else:
+            # Veri dizinin sonundan başa sarmış; iki parçayı sırayla birleştir
+            ts = np.concatenate((self._timestamps[start:], self._timestamps[:self._head]))
+            codes = np.concatenate((self._codes[start:], self._codes[:self._head]))
+            vals = np.concatenate((self._values[start:], self._values[:self._head]))
+
+        if seconds is not None and len(ts):
+            now = time.monotonic() if now is None else now
+            first = np.searchsorted(ts, now - seconds, side="left")
+            ts, codes, vals = ts[first:], codes[first:], vals[first:]
+        return ts, codes, vals
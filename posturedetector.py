@@ -2,6 +2,45 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+# Metrik hesabında kullanılan landmark indeksleri (sol taraf + sağ omuz)
+_PL = mp.solutions.pose.PoseLandmark
+LEFT_EAR = int(_PL.LEFT_EAR)
+LEFT_SHOULDER = int(_PL.LEFT_SHOULDER)
+RIGHT_SHOULDER = int(_PL.RIGHT_SHOULDER)
+LEFT_HIP = int(_PL.LEFT_HIP)
+LEFT_KNEE = int(_PL.LEFT_KNEE)
+N_LANDMARKS = len(_PL)
+
+# compute_metrics çıktısındaki sütun sırası
+METRIC_NAMES = ("shoulder_diff", "neck_angle", "back_angle")
+
+# Duruş durumları: (metin, renk, düzeltme gerekli mi). Sıra, durum kodunu belirler.
+STATUS_TABLE = (
+    ("Kişi Algılanamadı", "#6c757d", False), # Gri renk, nötr durum
+    ("Bekleniyor", "#6c757d", False), # Gri renk
+    ("Dik Durma", "#28a745", False), # Yeşil renk
+    ("Omuz Hizası Bozuk", "#dc3545", True), # Kırmızı renk
+    ("Boyun Öne Eğik", "#dc3545", True), # Kırmızı renk
+    ("Boyun Arkaya Eğik", "#ffc107", True), # Sarı renk
+    ("Öne Eğilme (Sırt)", "#dc3545", True), # Kırmızı renk
+    ("Arkaya Yaslanma (Sırt)", "#ffc107", True), # Sarı renk
+)
+STATUSES = tuple(status for status, _, _ in STATUS_TABLE)
+STATUS_COLORS = {status: color for status, color, _ in STATUS_TABLE}
+CORRECTION_CODES = np.array([code for code, (_, _, correction) in enumerate(STATUS_TABLE) if correction])
+# Her durumun gösterdiği değerin METRIC_NAMES sütunu (-1: değer yok, 0 gösterilir)
+STATUS_METRIC = np.array([-1, -1, 2, 0, 1, 1, 2, 2])
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Metrik başına eşik durumları
+LOW, OK, HIGH, MISSING = -1, 0, 1, 2
+
+
+def status_code(status: str) -> int:
+    """Durum metnini STATUS_TABLE'daki koduna çevirir; bilinmeyen durum için -1 döner."""
+    return _STATUS_CODES.get(status, -1)
+
+
 class PoseDetector:
     def __init__(self,
                  min_detection_confidence=0.5,
@@ -20,6 +59,83 @@ class PoseDetector:
         cos_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
         return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
 
+    @staticmethod
+    def landmarks_to_array(landmarks, w, h):
+        """MediaPipe pose_landmarks nesnesini (33, 2) boyutlu piksel koordinat dizisine çevirir."""
+        return np.array([[p.x * w, p.y * h] for p in landmarks.landmark], dtype=np.float64)
+
+    @staticmethod
+    def compute_metrics(points):
+        """
+        Landmark dizilerinden omuz farkı, boyun açısı ve sırt açısını vektörel olarak hesaplar.
+
+        Args:
+            points (numpy.ndarray): (..., 33, 2) boyutlu piksel koordinatları.
+                Kişi algılanamayan satırlar NaN olabilir.
+
+        Returns:
+            numpy.ndarray: (..., 3) boyutlu dizi, sütunlar METRIC_NAMES sırasındadır.
+                Hesaplanamayan metrikler NaN olur.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        # process() ile aynı şekilde (0, 0) koordinatlı noktalar eksik sayılır
+        missing = np.all(points == 0, axis=-1)
+
+        def angle(a, b, c):
+            ba = points[..., a, :] - points[..., b, :]
+            bc = points[..., c, :] - points[..., b, :]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cos_angle = np.sum(ba * bc, axis=-1) / (np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1))
+            deg = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+            return np.where(missing[..., a] | missing[..., b] | missing[..., c], np.nan, deg)
+
+        shoulder_diff = np.abs(points[..., LEFT_SHOULDER, 1] - points[..., RIGHT_SHOULDER, 1])
+        neck_angle = angle(LEFT_EAR, LEFT_SHOULDER, LEFT_HIP)
+        back_angle = angle(LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE)
+        return np.stack((shoulder_diff, neck_angle, back_angle), axis=-1)
+
+    @staticmethod
+    def metric_states(metrics, lower, upper):
+        """
+        Metrikleri eşiklere göre LOW/OK/HIGH durumlarına ayırır; NaN metrikler MISSING olur.
+
+        Args:
+            metrics (numpy.ndarray): (..., 3) boyutlu metrikler.
+            lower, upper: METRIC_NAMES sırasıyla alt/üst eşikler (omuz için alt eşik -inf).
+        """
+        metrics = np.asarray(metrics, dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            states = np.where(metrics > upper, HIGH, np.where(metrics < lower, LOW, OK))
+        return np.where(np.isnan(metrics), MISSING, states).astype(np.int8)
+
+    @staticmethod
+    def status_codes(states):
+        """
+        Metrik durumlarından genel duruş kodunu çıkarır.
+
+        Öncelik sırası: omuz hizası, boyun açısı, sırt açısı. Omuz metriği yoksa kişi
+        algılanamamıştır; sırt açısı hesaplanamıyorsa durum "Bekleniyor" olur.
+        """
+        sh, nk, bk = states[..., 0], states[..., 1], states[..., 2]
+        return np.select(
+            [sh == HIGH, nk == LOW, nk == HIGH, bk == LOW, bk == HIGH, bk == OK, sh == MISSING],
+            [status_code(s) for s in ("Omuz Hizası Bozuk", "Boyun Öne Eğik", "Boyun Arkaya Eğik",
+                                      "Öne Eğilme (Sırt)", "Arkaya Yaslanma (Sırt)", "Dik Durma",
+                                      "Kişi Algılanamadı")],
+            default=status_code("Bekleniyor"))
+
+    @staticmethod
+    def status_values(codes, metrics):
+        """Her durum kodu için ilgili metriğin değerini döndürür (değeri olmayan durumlarda 0)."""
+        idx = STATUS_METRIC[codes]
+        values = np.take_along_axis(np.asarray(metrics), np.maximum(idx, 0)[..., None], axis=-1)[..., 0]
+        return np.where(idx >= 0, values, 0.0)
+
+    def detect(self, frame):
+        """Kareden iskelet noktalarını çıkarır; kişi algılanamazsa None döner."""
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return self.pose.process(image_rgb).pose_landmarks
+
     def process(self, frame, shoulder_thresh, angle_lower, angle_upper, neck_angle_lower, neck_angle_upper):
         """
         Bir kareyi işler, duruşu analiz eder ve sonuçları döndürür.
@@ -35,82 +151,19 @@ class PoseDetector:
         Returns:
             tuple: (durum metni, düzeltme gerekli mi, renk kodu, ölçülen değer, iskelet noktaları)
         """
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image_rgb)
+        landmarks = self.detect(frame)
 
         # Eğer kişi algılanamazsa
-        if not results.pose_landmarks:
-            return "Kişi Algılanamadı", False, "#6c757d", 0, None # Gri renk, nötr durum
+        if not landmarks:
+            status, color, needs_correction = STATUS_TABLE[status_code("Kişi Algılanamadı")]
+            return status, needs_correction, color, 0, None
 
-        lm = results.pose_landmarks.landmark
         h, w, _ = frame.shape # Kare boyutlarını al
-
-        # Omuz Y koordinatlarını al
-        yL_shoulder = lm[self.mp_pose.PoseLandmark.LEFT_SHOULDER].y * h
-        yR_shoulder = lm[self.mp_pose.PoseLandmark.RIGHT_SHOULDER].y * h
-        shoulder_diff = abs(yL_shoulder - yR_shoulder)
-
-        # 1. Omuz Hizası Kontrolü (öncelikli)
-        if shoulder_diff > shoulder_thresh:
-            return "Omuz Hizası Bozuk", True, "#dc3545", shoulder_diff, results.pose_landmarks # Kırmızı renk
-
-        # 2. Boyun Açısı Kontrolü (kulak-omuz-kalça hattı)
-        # Sol taraf landmarklarını al (sağ taraf da kullanılabilir, simetri önemlidir)
-        try:
-            left_ear_coords = [lm[self.mp_pose.PoseLandmark.LEFT_EAR].x * w, lm[self.mp_pose.PoseLandmark.LEFT_EAR].y * h]
-            left_shoulder_coords = [lm[self.mp_pose.PoseLandmark.LEFT_SHOULDER].x * w, lm[self.mp_pose.PoseLandmark.LEFT_SHOULDER].y * h]
-            left_hip_coords = [lm[self.mp_pose.PoseLandmark.LEFT_HIP].x * w, lm[self.mp_pose.PoseLandmark.LEFT_HIP].y * h]
-
-            # Landmarkların algılanıp algılanmadığını basitçe kontrol et (sıfır olmayan koordinatlar)
-            # MediaPipe genellikle landmarkları bulamayınca 0 döndürmez, ancak görünürlük kontrolü daha sağlamdır.
-            # Burada basit bir sıfır kontrolü yapıyoruz.
-            if (left_ear_coords[0] != 0 or left_ear_coords[1] != 0) and \
-               (left_shoulder_coords[0] != 0 or left_shoulder_coords[1] != 0) and \
-               (left_hip_coords[0] != 0 or left_hip_coords[1] != 0):
-                
-                neck_angle = self.calculate_angle(left_ear_coords, left_shoulder_coords, left_hip_coords)
-
-                # Boyun öne eğik ise (açı alt eşikten küçükse)
-                if neck_angle < neck_angle_lower:
-                    return "Boyun Öne Eğik", True, "#dc3545", neck_angle, results.pose_landmarks # Kırmızı renk
-                # Boyun çok fazla geriye eğik ise (istenen üst eşiğin üzerindeyse)
-                elif neck_angle > neck_angle_upper:
-                    return "Boyun Arkaya Eğik", True, "#ffc107", neck_angle, results.pose_landmarks # Sarı renk
-                # Boyun ideal aralıktaysa, diğer kontrolleri atlamamak için pas geçilir
-                # ve sonraki sırt açısı kontrolüne bırakılır.
-                # Aksi takdirde, sürekli "Dik Durma" veya benzeri bir boyun durumu mesajı gönderilebilir,
-                # ancak genel duruş değerlendirmesini sırt açısı belirlesin istiyoruz.
-                pass
-
-        except Exception as e:
-            # Landmarkların bulunamaması veya hesaplama hatası durumunda, boyun kontrolünü atla
-            # print(f"Boyun açısı hesaplanırken hata oluştu: {e}. Landmarklar bulunamadı.")
-            pass # Diğer kontrollere devam et
-
-        # 3. Sırt Açısı Kontrolü (kalça-diz açısı)
-        # Sol taraf landmarklarını kullanarak açıyı hesapla
-        shoulder_hip_knee_angle = 0 # Varsayılan değer, eğer landmarklar bulunamazsa
-        try:
-            shoulder_coords = [lm[self.mp_pose.PoseLandmark.LEFT_SHOULDER].x * w, yL_shoulder]
-            hip_coords = [lm[self.mp_pose.PoseLandmark.LEFT_HIP].x * w, lm[self.mp_pose.PoseLandmark.LEFT_HIP].y * h]
-            knee_coords = [lm[self.mp_pose.PoseLandmark.LEFT_KNEE].x * w, lm[self.mp_pose.PoseLandmark.LEFT_KNEE].y * h]
-
-            if (shoulder_coords[0] != 0 or shoulder_coords[1] != 0) and \
-               (hip_coords[0] != 0 or hip_coords[1] != 0) and \
-               (knee_coords[0] != 0 or knee_coords[1] != 0):
-                
-                shoulder_hip_knee_angle = self.calculate_angle(shoulder_coords, hip_coords, knee_coords)
-
-                if shoulder_hip_knee_angle < angle_lower:
-                    return "Öne Eğilme (Sırt)", True, "#dc3545", shoulder_hip_knee_angle, results.pose_landmarks # Kırmızı renk
-                elif shoulder_hip_knee_angle > angle_upper:
-                    return "Arkaya Yaslanma (Sırt)", True, "#ffc107", shoulder_hip_knee_angle, results.pose_landmarks # Sarı renk
-                else:
-                    return "Dik Durma", False, "#28a745", shoulder_hip_knee_angle, results.pose_landmarks # Yeşil renk
-
-        except Exception as e:
-            # print(f"Kalça-Diz açısı hesaplanırken hata oluştu: {e}. Landmarklar bulunamadı.")
-            pass # Varsayılan olarak "Bekleniyor" veya diğer kontrolleri bekle
-
-        # Hiçbir problem tespit edilmezse veya tüm gerekli landmarklar bulunamazsa varsayılan durum
-        return "Bekleniyor", False, "#6c757d", 0, results.pose_landmarks # Gri renk
+        metrics = self.compute_metrics(self.landmarks_to_array(landmarks, w, h))
+        states = self.metric_states(
+            metrics,
+            (-np.inf, neck_angle_lower, angle_lower),
+            (shoulder_thresh, neck_angle_upper, angle_upper))
+        code = int(self.status_codes(states))
+        status, color, needs_correction = STATUS_TABLE[code]
+        return status, needs_correction, color, float(self.status_values(code, metrics)), landmarks
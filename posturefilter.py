@@ -0,0 +1,351 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from logger import LOG_DIR
+from posturedetector import PoseDetector, CORRECTION_CODES, LOW, HIGH, MISSING, N_LANDMARKS
+
+# Kullanıcıya göre ayarlanabilen varsayılan filtre parametreleri
+DEFAULT_CONFIG = {
+    "min_cutoff": 1.0,          # One-Euro minimum kesim frekansı (Hz)
+    "beta": 0.05,               # Hız katsayısı; 0 verilirse sabit üstel (EMA) filtre olur
+    "d_cutoff": 1.0,            # Hız tahmini için kesim frekansı (Hz)
+    "shoulder_hysteresis": 4.0, # Omuz farkı histerezis bandı (px)
+    "angle_hysteresis": 3.0,    # Boyun ve sırt açıları için histerezis bandı (°)
+    "min_dwell": 0.5,           # Yeni durumun geçerli sayılması için en kısa süre (s)
+}
+
+# Sıfır olamayacak (bölen olarak kullanılan) ayarlar; diğerleri >= 0 olmalıdır
+_POSITIVE_KEYS = ("min_cutoff", "d_cutoff")
+
+# GUI'deki varsayılan eşikler: (alt, üst) — METRIC_NAMES sırasıyla
+DEFAULT_LOWER = (-np.inf, 140, 160)
+DEFAULT_UPPER = (26, 180, 180)
+
+def config_path(username: str) -> str:
+    """Kullanıcının filtre ayar dosyasının yolunu döndürür."""
+    return os.path.join(LOG_DIR, f"filter_config_{username}.json")
+
+
+def _valid_setting(key, value) -> bool:
+    """Ayar değerinin sonlu bir sayı ve izin verilen aralıkta olup olmadığını kontrol eder."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+        return False
+    return value > 0 if key in _POSITIVE_KEYS else value >= 0
+
+
+def sanitize_config(data) -> dict:
+    """Ayarları DEFAULT_CONFIG ile birleştirir; geçersiz değerler yerine varsayılanları kullanır."""
+    config = dict(DEFAULT_CONFIG)
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in DEFAULT_CONFIG and _valid_setting(key, value):
+                config[key] = float(value)
+    return config
+
+
+def load_config(username: str) -> dict:
+    """
+    Kullanıcının filtre ayarlarını okur.
+
+    Eksik, sayısal olmayan, sonlu olmayan (NaN/Infinity) veya aralık dışı değerler
+    DEFAULT_CONFIG'deki varsayılanlarla değiştirilir.
+    """
+    path = config_path(username)
+    if not os.path.isfile(path):
+        return dict(DEFAULT_CONFIG)
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return dict(DEFAULT_CONFIG) # Okunamayan dosyada varsayılanlarla devam et
+    return sanitize_config(data)
+
+
+def save_config(username: str, config: dict):
+    """Kullanıcının filtre ayarlarını JSON olarak kaydeder."""
+    with open(config_path(username), mode='w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+
+def _alpha(cutoff, dt):
+    """Verilen kesim frekansı ve zaman adımı için üstel yumuşatma katsayısı."""
+    tau = 1.0 / (2 * np.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """
+    Landmark dizileri için vektörel One-Euro filtresi.
+
+    Her akışın (stream) durumu numpy dizilerinde tutulur; tek çağrıda tüm akışlar
+    filtrelenir. NaN içeren (kişi algılanamayan) akışlar sıfırlanır ve bir sonraki
+    geçerli karede filtre o değerden yeniden başlar.
+    """
+
+    def __init__(self, shape, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        """shape: (akış sayısı, landmark sayısı, 2) gibi, ilk eksen akışlardır."""
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = np.zeros(shape, dtype=np.float64)
+        self._dx = np.zeros(shape, dtype=np.float64)
+        self._t = np.zeros(shape[0], dtype=np.float64)
+        self._ready = np.zeros(shape[0], dtype=bool)
+
+    def reset(self):
+        self._ready[:] = False
+
+    def __call__(self, x, t):
+        """
+        Yeni gözlemleri filtreler.
+
+        Args:
+            x (numpy.ndarray): Filtre şekliyle aynı boyutta gözlemler.
+            t (float | numpy.ndarray): Zaman damgası (saniye), tek değer veya akış başına.
+
+        Returns:
+            numpy.ndarray: Yumuşatılmış değerler (geçersiz akışlarda NaN).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        t = np.broadcast_to(np.asarray(t, dtype=np.float64), self._t.shape)
+        expand = (-1,) + (1,) * (x.ndim - 1) # Akış başına değerleri x'e yaymak için
+
+        valid = ~np.isnan(x).reshape(len(x), -1).any(axis=1)
+        fresh = (valid & ~self._ready).reshape(expand)
+        valid_b = valid.reshape(expand)
+
+        dt = t - self._t
+        dt = np.where(dt > 0, dt, 1e-3).reshape(expand) # Aynı zaman damgasında sıfıra bölmeyi önle
+
+        with np.errstate(invalid='ignore'):
+            a_d = _alpha(self.d_cutoff, dt)
+            dx = a_d * ((x - self._x) / dt) + (1 - a_d) * self._dx
+            a = _alpha(self.min_cutoff + self.beta * np.abs(dx), dt)
+            x_hat = a * x + (1 - a) * self._x
+
+        x_hat = np.where(fresh, x, x_hat)
+        dx = np.where(fresh, 0.0, dx)
+
+        self._x = np.where(valid_b, x_hat, self._x)
+        self._dx = np.where(valid_b, dx, self._dx)
+        self._t = np.where(valid, t, self._t)
+        self._ready = valid
+        return np.where(valid_b, x_hat, np.nan)
+
+
+class PostureDebouncer:
+    """
+    Metrik başına histerezis ve minimum bekleme süresi uygulayan durum makinesi.
+
+    Bir metrik eşiği aştığında hemen kötü duruma geçmez; yeni durum en az
+    `min_dwell` saniye boyunca sürmelidir. Kötü durumdan çıkmak için de değerin
+    eşiğin histerezis bandı kadar içine dönmesi gerekir. Sınıflandırma
+    PoseDetector.process ile aynı eşik ve öncelik kurallarını kullanır. Tüm akışlar
+    tek numpy durum dizisiyle birlikte güncellenir.
+    """
+
+    def __init__(self, n_streams=1, hysteresis=(4.0, 3.0, 3.0), min_dwell=0.5):
+        self.hysteresis = np.asarray(hysteresis, dtype=np.float64)
+        self.min_dwell = min_dwell
+        n_metrics = len(self.hysteresis)
+        self.lower = np.broadcast_to(np.asarray(DEFAULT_LOWER, dtype=np.float64), (n_streams, n_metrics)).copy()
+        self.upper = np.broadcast_to(np.asarray(DEFAULT_UPPER, dtype=np.float64), (n_streams, n_metrics)).copy()
+        self.state = np.full((n_streams, n_metrics), MISSING, dtype=np.int8)
+        self._pending = self.state.copy()
+        self._since = np.zeros((n_streams, n_metrics), dtype=np.float64)
+        self._last = np.full((n_streams, n_metrics), np.nan) # Son geçerli metrik değerleri
+        self.status = PoseDetector.status_codes(self.state).astype(np.int8)
+
+    def set_thresholds(self, lower, upper):
+        """Alt/üst eşikleri ayarlar; (n_metrics,) veya (n_streams, n_metrics) boyutunda olabilir."""
+        self.lower[:] = lower
+        self.upper[:] = upper
+
+    def update(self, metrics, t):
+        """
+        Yeni metrikleri işler.
+
+        Args:
+            metrics (numpy.ndarray): (n_streams, n_metrics) boyutunda ölçümler (eksikse NaN).
+            t (float | numpy.ndarray): Zaman damgası (saniye).
+
+        Returns:
+            tuple: (durum kodları, değerler, durum değişen akışların maskesi)
+        """
+        metrics = np.asarray(metrics, dtype=np.float64)
+        t = np.asarray(t, dtype=np.float64)
+        if t.ndim:
+            t = t[:, None]
+
+        target = PoseDetector.metric_states(metrics, self.lower, self.upper)
+        # Histerezis: kötü durumdaki metrik, bant içine dönene kadar o durumda kalır
+        with np.errstate(invalid='ignore'):
+            hold_high = (self.state == HIGH) & (metrics > self.upper - self.hysteresis)
+            hold_low = (self.state == LOW) & (metrics < self.lower + self.hysteresis)
+        target = np.where(hold_high, HIGH, np.where(hold_low, LOW, target))
+
+        # Minimum bekleme: hedef değişince sayaç yeniden başlar
+        restart = target != self._pending
+        self._since = np.where(restart, t, self._since)
+        self._pending = target.astype(np.int8)
+        commit = (self._pending != self.state) & (t - self._since >= self.min_dwell)
+        self.state = np.where(commit, self._pending, self.state).astype(np.int8)
+
+        # Metrik geçici olarak kaybolursa (NaN) durum değişene kadar son geçerli değer gösterilir
+        self._last = np.where(np.isnan(metrics), self._last, metrics)
+        codes = PoseDetector.status_codes(self.state)
+        values = PoseDetector.status_values(codes, self._last)
+        changed = codes != self.status
+        self.status = codes.astype(np.int8)
+        return codes, values, changed
+
+
+def replay(points, timestamps, config=None, lower=DEFAULT_LOWER, upper=DEFAULT_UPPER):
+    """
+    Kaydedilmiş landmarkları filtreli ve filtresiz olarak yeniden oynatır.
+
+    Filtresiz durumda mevcut davranış varsayılır: her kare loglanır ve düzeltme
+    gereken her karede bildirim gönderilir. Filtreli durumda sadece durum
+    değişimleri loglanır ve kötü duruma geçişlerde bildirim gönderilir.
+
+    Args:
+        points (numpy.ndarray): (T, 33, 2) veya (T, n_streams, 33, 2) piksel koordinatları.
+        timestamps (numpy.ndarray): (T,) zaman damgaları (saniye).
+        config (dict): Filtre ayarları (varsayılan: DEFAULT_CONFIG).
+        lower, upper: METRIC_NAMES sırasıyla eşikler; (3,) veya kare başına (T, 3).
+
+    Returns:
+        dict: Akış başına bildirim, yazma ve durum değişimi sayıları.
+    """
+    config = sanitize_config(config or {})
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 3:
+        points = points[:, None]
+    n_streams = points.shape[1]
+    # Eşikler kare başına tutulur; kayıt sırasında değiştirilmiş olabilirler
+    lower = np.broadcast_to(np.asarray(lower, dtype=np.float64), (len(points), 3))
+    upper = np.broadcast_to(np.asarray(upper, dtype=np.float64), (len(points), 3))
+
+    # Filtresiz: tüm kareler tek seferde vektörel olarak sınıflandırılır
+    raw_metrics = PoseDetector.compute_metrics(points)
+    raw_codes = PoseDetector.status_codes(
+        PoseDetector.metric_states(raw_metrics, lower[:, None], upper[:, None]))
+
+    smoother = OneEuroFilter(points.shape[1:], config["min_cutoff"], config["beta"], config["d_cutoff"])
+    debouncer = PostureDebouncer(
+        n_streams,
+        (config["shoulder_hysteresis"], config["angle_hysteresis"], config["angle_hysteresis"]),
+        config["min_dwell"])
+
+    events = np.zeros(n_streams, dtype=np.int64)
+    notifications = np.zeros(n_streams, dtype=np.int64)
+    for frame_points, t, frame_lower, frame_upper in zip(points, timestamps, lower, upper):
+        debouncer.set_thresholds(frame_lower, frame_upper)
+        metrics = PoseDetector.compute_metrics(smoother(frame_points, t))
+        codes, _, changed = debouncer.update(metrics, t)
+        events += changed
+        notifications += changed & np.isin(codes, CORRECTION_CODES)
+
+    return {
+        "raw_writes": np.full(n_streams, len(points), dtype=np.int64),
+        "raw_notifications": np.isin(raw_codes, CORRECTION_CODES).sum(axis=0),
+        "raw_flips": (np.diff(raw_codes, axis=0) != 0).sum(axis=0),
+        "writes": events,
+        "notifications": notifications,
+    }
+
+
+def save_recording(path, timestamps, points, lower, upper):
+    """
+    Landmark kaydını .npz olarak saklar.
+
+    Args:
+        timestamps: (T,) zaman damgaları.
+        points: (T, 33, 2) noktalar.
+        lower, upper: (T, 3) kare başına geçerli olan alt/üst eşikler.
+    """
+    np.savez_compressed(path, timestamps=np.asarray(timestamps, dtype=np.float64),
+                        points=np.asarray(points, dtype=np.float32),
+                        lower=np.asarray(lower, dtype=np.float64),
+                        upper=np.asarray(upper, dtype=np.float64))
+
+
+def load_recording(*paths):
+    """
+    save_recording ile kaydedilmiş dosyaları okur.
+
+    Birden fazla parça verilirse dosya adı sırasıyla birleştirilir. Eşik içermeyen
+    eski kayıtlarda DEFAULT_LOWER/DEFAULT_UPPER kullanılır.
+
+    Returns:
+        tuple: (zaman damgaları, noktalar, alt eşikler, üst eşikler)
+    """
+    times, points, lower, upper = [], [], [], []
+    for path in sorted(paths):
+        with np.load(path) as data:
+            n = len(data["timestamps"])
+            times.append(data["timestamps"])
+            points.append(data["points"])
+            lower.append(data["lower"] if "lower" in data else np.tile(DEFAULT_LOWER, (n, 1)))
+            upper.append(data["upper"] if "upper" in data else np.tile(DEFAULT_UPPER, (n, 1)))
+    return np.concatenate(times), np.concatenate(points), np.concatenate(lower), np.concatenate(upper)
+
+
+class LandmarkRecorder:
+    """
+    Landmark kaydını sabit boyutlu parçalar halinde diske yazar.
+
+    Kareler önceden ayrılmış bir diziye yazılır; dizi dolunca
+    `<base_path>_partNNN.npz` dosyasına kaydedilip baştan kullanılır. Böylece uzun
+    kayıtlarda bellek kullanımı sabit kalır ve çökme durumunda en fazla son parça kaybolur.
+    """
+
+    def __init__(self, base_path, chunk_size=1800, n_landmarks=N_LANDMARKS):
+        self.base_path = base_path
+        self._times = np.empty(chunk_size, dtype=np.float64)
+        self._points = np.empty((chunk_size, n_landmarks, 2), dtype=np.float32)
+        self._lower = np.empty((chunk_size, 3), dtype=np.float64)
+        self._upper = np.empty((chunk_size, 3), dtype=np.float64)
+        self._count = 0
+        self._part = 0
+
+    def append(self, t, points, lower, upper):
+        """Bir kareyi o anki eşiklerle birlikte kayda ekler; parça dolduysa diske yazar."""
+        self._times[self._count] = t
+        self._points[self._count] = points
+        self._lower[self._count] = lower
+        self._upper[self._count] = upper
+        self._count += 1
+        if self._count == len(self._times):
+            self.flush()
+
+    def flush(self):
+        """Bekleyen kareleri yeni bir parça dosyasına yazar."""
+        if not self._count:
+            return
+        path = f"{self.base_path}_part{self._part:03d}.npz"
+        n = self._count
+        save_recording(path, self._times[:n], self._points[:n], self._lower[:n], self._upper[:n])
+        self._part += 1
+        self._count = 0
+
+
+if __name__ == "__main__":
+    # Kullanım: python posturefilter.py logs/landmarks_<kullanıcı>_<tarih>_part*.npz [kullanıcı]
+    files = [arg for arg in sys.argv[1:] if arg.endswith(".npz")]
+    users = [arg for arg in sys.argv[1:] if not arg.endswith(".npz")]
+    if not files:
+        print("Kullanım: python posturefilter.py <kayıt_part000.npz> [<kayıt_part001.npz> ...] [kullanıcı adı]")
+        sys.exit(1)
+    ts, pts, lower, upper = load_recording(*files)
+    cfg = load_config(users[0]) if users else DEFAULT_CONFIG
+    result = replay(pts, ts, cfg, lower, upper) # Kayıt sırasındaki eşiklerle oynat
+    for key, counts in result.items():
+        print(f"{key}: {', '.join(str(c) for c in counts)}")
+    raw_n, filt_n = result["raw_notifications"].sum(), result["notifications"].sum()
+    raw_w, filt_w = result["raw_writes"].sum(), result["writes"].sum()
+    print(f"Bildirim azalması: {raw_n} -> {filt_n}")
+    print(f"Log yazma azalması: {raw_w} -> {filt_w}")
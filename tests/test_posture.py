@@ -0,0 +1,155 @@
+"""
+Duruş sınıflandırması ve zamansal katman için regresyon testleri.
+
+Çalıştırma: python -m pytest -q tests
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+import posturefilter as pf  # noqa: E402
+from posturedetector import (  # noqa: E402
+    PoseDetector, STATUSES, LEFT_EAR, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, LEFT_KNEE,
+)
+
+# Testlerde kullanılan eşikler: METRIC_NAMES sırasıyla (omuz, boyun, sırt)
+LOWER = (-np.inf, 140, 160)
+UPPER = (26, 180, 180)
+GOOD = (10.0, 160.0, 170.0)
+
+
+def reference_process(points, shoulder_thresh, angle_lower, angle_upper, neck_angle_lower, neck_angle_upper):
+    """PoseDetector.process'in eski (kare kare, if/else) kurallarıyla (durum, değer) döndürür."""
+    def nonzero(p):
+        return p[0] != 0 or p[1] != 0
+
+    ear, l_sh, r_sh = points[LEFT_EAR], points[LEFT_SHOULDER], points[RIGHT_SHOULDER]
+    hip, knee = points[LEFT_HIP], points[LEFT_KNEE]
+
+    shoulder_diff = abs(l_sh[1] - r_sh[1])
+    if shoulder_diff > shoulder_thresh:
+        return "Omuz Hizası Bozuk", shoulder_diff
+    if nonzero(ear) and nonzero(l_sh) and nonzero(hip):
+        neck = PoseDetector.calculate_angle(ear, l_sh, hip)
+        if neck < neck_angle_lower:
+            return "Boyun Öne Eğik", neck
+        if neck > neck_angle_upper:
+            return "Boyun Arkaya Eğik", neck
+    if nonzero(l_sh) and nonzero(hip) and nonzero(knee):
+        back = PoseDetector.calculate_angle(l_sh, hip, knee)
+        if back < angle_lower:
+            return "Öne Eğilme (Sırt)", back
+        if back > angle_upper:
+            return "Arkaya Yaslanma (Sırt)", back
+        return "Dik Durma", back
+    return "Bekleniyor", 0
+
+
+def make_detector(landmarks):
+    """MediaPipe modeli yüklemeden, detect() sabit landmark döndüren bir dedektör oluşturur."""
+    detector = PoseDetector.__new__(PoseDetector)
+    detector.detect = lambda frame: landmarks
+    return detector
+
+
+def test_process_matches_reference_rules():
+    rng = np.random.default_rng(0)
+    h, w = 480, 640
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    for _ in range(2000):
+        norm = rng.uniform(0, 1, size=(33, 2))
+        # Bazı noktaları eksik (0, 0) yap
+        for idx in (LEFT_EAR, LEFT_HIP, LEFT_KNEE):
+            if rng.random() < 0.1:
+                norm[idx] = 0
+        landmarks = SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y) for x, y in norm])
+        thresholds = (rng.uniform(0, 60), rng.uniform(60, 170), 180,
+                      rng.uniform(60, 170), 180)
+
+        status, _, _, value, _ = make_detector(landmarks).process(frame, *thresholds)
+        ref_status, ref_value = reference_process(norm * (w, h), *thresholds)
+        assert status == ref_status
+        assert value == pytest.approx(ref_value)
+
+
+def test_process_without_person():
+    status, needs_correction, _, value, landmarks = make_detector(None).process(
+        np.zeros((10, 10, 3), dtype=np.uint8), 26, 160, 180, 140, 180)
+    assert (status, needs_correction, value, landmarks) == ("Kişi Algılanamadı", False, 0, None)
+
+
+def make_debouncer(min_dwell=0.0):
+    debouncer = pf.PostureDebouncer(n_streams=1, hysteresis=(4.0, 3.0, 3.0), min_dwell=min_dwell)
+    debouncer.set_thresholds(LOWER, UPPER)
+    return debouncer
+
+
+def feed(debouncer, shoulder, t):
+    codes, values, changed = debouncer.update(np.array([[shoulder, GOOD[1], GOOD[2]]]), t)
+    return STATUSES[codes[0]], values[0], bool(changed[0])
+
+
+def test_hysteresis_holds_until_band_is_left():
+    debouncer = make_debouncer()
+    assert feed(debouncer, 10, 0.0)[0] == "Dik Durma"
+    assert feed(debouncer, 30, 0.1)[0] == "Omuz Hizası Bozuk"
+    # Eşiğin altında ama histerezis bandı (26 - 4 px) içinde: durum korunur
+    assert feed(debouncer, 24, 0.2)[0] == "Omuz Hizası Bozuk"
+    assert feed(debouncer, 21, 0.3)[0] == "Dik Durma"
+
+
+def test_dwell_restarts_when_target_changes():
+    debouncer = make_debouncer(min_dwell=0.5)
+    for t in (0.0, 0.5, 1.0):
+        feed(debouncer, 10, t)
+    assert feed(debouncer, 10, 1.0)[0] == "Dik Durma"
+
+    feed(debouncer, 30, 1.1)
+    feed(debouncer, 10, 1.5) # Kısa süreli dönüş bekleme süresini sıfırlar
+    assert feed(debouncer, 30, 1.6)[0] == "Dik Durma"
+    assert feed(debouncer, 30, 2.0)[0] == "Dik Durma"
+    status, _, changed = feed(debouncer, 30, 2.1)
+    assert status == "Omuz Hizası Bozuk" and changed
+
+
+def test_missing_metrics_keep_last_value_then_report_no_person():
+    debouncer = make_debouncer(min_dwell=0.5)
+    for t in (0.0, 0.6):
+        feed(debouncer, 10, t)
+
+    missing = np.full((1, 3), np.nan)
+    codes, values, _ = debouncer.update(missing, 0.7)
+    assert STATUSES[codes[0]] == "Dik Durma"
+    assert values[0] == pytest.approx(GOOD[2]) # 0'a düşmez, son geçerli değer kalır
+
+    codes, values, changed = debouncer.update(missing, 1.2)
+    assert STATUSES[codes[0]] == "Kişi Algılanamadı" and changed[0]
+    assert values[0] == 0
+
+
+def test_one_euro_resets_after_missing_frame():
+    smoother = pf.OneEuroFilter((1, 2, 2))
+    smoother(np.zeros((1, 2, 2)), 0.0)
+    smoothed = smoother(np.ones((1, 2, 2)), 0.1)
+    assert np.all((smoothed > 0) & (smoothed < 1))
+
+    assert np.all(np.isnan(smoother(np.full((1, 2, 2), np.nan), 0.2)))
+    # Yeniden başlayan akış ilk geçerli karede ham değeri döndürür
+    np.testing.assert_array_equal(smoother(np.full((1, 2, 2), 5.0), 0.3), 5.0)
+
+
+def test_sanitize_config_rejects_invalid_values():
+    config = pf.sanitize_config({
+        "d_cutoff": 0, "min_cutoff": -1, "min_dwell": float("nan"),
+        "beta": float("inf"), "angle_hysteresis": -2, "shoulder_hysteresis": 7, "unknown": 1,
+    })
+    expected = dict(pf.DEFAULT_CONFIG, shoulder_hysteresis=7.0)
+    assert config == expected